@@ -14,12 +14,27 @@ Make sure to configure your .env file with the required Azure credentials and en
 import os
 import sys
 import time
+import asyncio
+import logging
 from dotenv import load_dotenv
 from src.azure_client import AzureClients
+from src.config import Settings
 from src.pdf_processor import PDFProcessor
 from src.utils import print_header, print_section, format_duration
 
 
+def configure_logging():
+    """Print the application's log records to stdout as plain messages."""
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    # Only the application's own loggers; Azure SDK loggers stay at their defaults
+    app_logger = logging.getLogger("src")
+    app_logger.addHandler(handler)
+    app_logger.setLevel(logging.INFO)
+    app_logger.propagate = False
+
+
 def load_environment():
     """Load environment variables from .env file."""
     # Try to load .env file
@@ -32,27 +47,85 @@ def load_environment():
         print(f"   Copy .env.example to .env and configure your Azure settings.")
 
 
-def print_configuration():
+def print_configuration(settings: Settings):
     """Print current configuration (without secrets)."""
     print_section("Configuration")
     
     config_items = [
-        ("Storage Account", os.getenv('AZURE_STORAGE_ACCOUNT_NAME', 'Not set')),
-        ("Source Container", os.getenv('AZURE_STORAGE_CONTAINER_NAME', 'Not set')),
-        ("Output Container", os.getenv('AZURE_STORAGE_OUTPUT_CONTAINER', 'Not set')),
-        ("Document Intelligence Endpoint", os.getenv('AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT', 'Not set')),
-        ("Max Concurrent Operations", os.getenv('MAX_CONCURRENT_OPERATIONS', '5')),
-        ("Polling Interval (seconds)", os.getenv('POLLING_INTERVAL_SECONDS', '5')),
-        ("Use Managed Identity", os.getenv('AZURE_USE_MANAGED_IDENTITY', 'false')),
+        ("Storage Account", settings.storage_account_name or 'Not set'),
+        ("Source Container", settings.storage_container_name or 'Not set'),
+        ("Source Prefix", settings.source_prefix or '(all blobs)'),
+        ("Output Container", settings.output_container_name or 'Not set'),
+        ("Document Intelligence Endpoint", settings.doc_intel_endpoint or 'Not set'),
+        ("Max Concurrent Operations", settings.max_concurrent_operations),
+        ("Max Polling Interval (seconds)", settings.polling_interval),
+        ("Doc Intel Max Requests/Second", settings.max_requests_per_second),
+        ("HTTP Connection Pool Size", settings.http_pool_size),
+        ("Use Managed Identity", str(settings.use_managed_identity).lower()),
     ]
     
     for label, value in config_items:
         print(f"  {label:.<30} {value}")
 
 
+async def process_documents(settings: Settings, start_time: float) -> int:
+    """Connect to Azure and process all pending PDFs."""
+    # Initialize Azure clients
+    print_section("Initializing Azure Connections")
+    async with AzureClients(settings) as azure_clients:
+        
+        # Test connections
+        if not await azure_clients.test_connections():
+            print("\n❌ Failed to connect to Azure services. Please check your configuration.")
+            return 1
+        
+        # Initialize PDF processor
+        print_section("Initializing PDF Processor")
+        async with PDFProcessor(azure_clients, settings) as pdf_processor:
+            
+            # Validate output container
+            if not await pdf_processor.validate_output_container():
+                return 1
+            
+            # Discover PDF files
+            print_section("Discovering PDF Files")
+            pdf_files = await pdf_processor.discover_pdf_files()
+            
+            if not pdf_files:
+                print("📭 No PDF files found in the source container.")
+                print("   Please upload some PDF files and try again.")
+                return 0
+            
+            # Check for existing processed files
+            print_section("Checking Existing Files")
+            files_to_process, files_already_processed = await pdf_processor.check_existing_files(pdf_files)
+            
+            if not files_to_process:
+                print("✅ All PDF files have already been processed!")
+                return 0
+            
+            # Confirm processing
+            print_section("Starting Processing")
+            print(f"📋 Ready to process {len(files_to_process)} PDF files")
+            
+            # Process all PDFs
+            await pdf_processor.process_all_pdfs(files_to_process)
+    
+    # Print final summary
+    total_time = time.time() - start_time
+    print_section("Summary")
+    print(f"🎉 Application completed successfully in {format_duration(total_time)}")
+    print(f"📊 Total files discovered: {len(pdf_files)}")
+    print(f"✅ Files processed: {len(files_to_process)}")
+    print(f"⏭️  Files skipped (already processed): {len(files_already_processed)}")
+    
+    return 0
+
+
 def main():
     """Main application entry point."""
     start_time = time.time()
+    configure_logging()
     
     print_header("Azure Document Intelligence PDF Processor")
     print("🚀 Starting PDF processing application...")
@@ -60,58 +133,10 @@ def main():
     try:
         # Load environment configuration
         load_environment()
-        print_configuration()
-        
-        # Initialize Azure clients
-        print_section("Initializing Azure Connections")
-        azure_clients = AzureClients()
-        
-        # Test connections
-        if not azure_clients.test_connections():
-            print("\n❌ Failed to connect to Azure services. Please check your configuration.")
-            return 1
-        
-        # Initialize PDF processor
-        print_section("Initializing PDF Processor")
-        pdf_processor = PDFProcessor(azure_clients)
-        
-        # Validate output container
-        if not pdf_processor.validate_output_container():
-            return 1
-        
-        # Discover PDF files
-        print_section("Discovering PDF Files")
-        pdf_files = pdf_processor.discover_pdf_files()
-        
-        if not pdf_files:
-            print("📭 No PDF files found in the source container.")
-            print("   Please upload some PDF files and try again.")
-            return 0
-        
-        # Check for existing processed files
-        print_section("Checking Existing Files")
-        files_to_process, files_already_processed = pdf_processor.check_existing_files(pdf_files)
-        
-        if not files_to_process:
-            print("✅ All PDF files have already been processed!")
-            return 0
-        
-        # Confirm processing
-        print_section("Starting Processing")
-        print(f"📋 Ready to process {len(files_to_process)} PDF files")
-        
-        # Process all PDFs
-        pdf_processor.process_all_pdfs(files_to_process)
-        
-        # Print final summary
-        total_time = time.time() - start_time
-        print_section("Summary")
-        print(f"🎉 Application completed successfully in {format_duration(total_time)}")
-        print(f"📊 Total files discovered: {len(pdf_files)}")
-        print(f"✅ Files processed: {len(files_to_process)}")
-        print(f"⏭️  Files skipped (already processed): {len(files_already_processed)}")
+        settings = Settings.from_env()
+        print_configuration(settings)
         
-        return 0
+        return asyncio.run(process_documents(settings, start_time))
         
     except KeyboardInterrupt:
         print("\n\n⚠️  Processing interrupted by user (Ctrl+C)")
@@ -3,108 +3,223 @@ Azure client configuration and authentication module.
 Handles connection to Azure Storage and Document Intelligence services.
 """
 
-import os
-from typing import Optional
-from azure.identity import DefaultAzureCredential, ClientSecretCredential
-from azure.storage.blob import BlobServiceClient
-from azure.ai.documentintelligence import DocumentIntelligenceClient
-from azure.core.credentials import AzureKeyCredential
+import time
+import asyncio
+import logging
+import aiohttp
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Optional, Tuple
+from azure.identity.aio import (
+    AzureCliCredential, ChainedTokenCredential, EnvironmentCredential, ManagedIdentityCredential
+)
+from azure.storage.blob import BlobSasPermissions, UserDelegationKey, generate_blob_sas
+from azure.storage.blob.aio import BlobClient, BlobServiceClient
+from azure.core.credentials import AccessToken
+from azure.core.credentials_async import AsyncTokenCredential
+from azure.core.pipeline.transport import AioHttpTransport
+from .config import Settings
+
+
+logger = logging.getLogger(__name__)
+
+
+# Chunk size for blob transfers; larger chunks mean fewer round-trips per PDF
+BLOB_TRANSFER_CHUNK_SIZE = 16 * 1024 * 1024
+
+# Parallel range requests used for a single blob download or upload
+BLOB_TRANSFER_CONCURRENCY = 8
+
+# Lifetime of the user delegation key used to sign SAS URLs, and of each SAS URL
+USER_DELEGATION_KEY_LIFETIME = timedelta(hours=6)
+SAS_LIFETIME = timedelta(hours=1)
+
+# Cached tokens are refreshed once they are this close to expiry (seconds)
+TOKEN_REFRESH_MARGIN_SECONDS = 300
+
+
+class CachedTokenCredential(AsyncTokenCredential):
+    """Async credential wrapper that reuses tokens until they near expiry.
+    
+    Azure CLI authentication starts an `az` subprocess on every get_token call;
+    caching here gives every client and concurrent task one shared token per scope.
+    """
+    
+    def __init__(self, credential: AsyncTokenCredential):
+        self._credential = credential
+        self._tokens: Dict[Tuple[Any, ...], AccessToken] = {}
+        self._lock = asyncio.Lock()
+    
+    def _is_fresh(self, token: Optional[AccessToken]) -> bool:
+        return token is not None and token.expires_on - time.time() > TOKEN_REFRESH_MARGIN_SECONDS
+    
+    async def get_token(self, *scopes: str, **kwargs: Any) -> AccessToken:
+        # Claims challenges must always reach the underlying credential
+        if kwargs.get('claims'):
+            return await self._credential.get_token(*scopes, **kwargs)
+        
+        key = scopes + (kwargs.get('tenant_id'),)
+        token = self._tokens.get(key)
+        if self._is_fresh(token):
+            return token
+        
+        async with self._lock:
+            # Another task may have refreshed the token while we waited
+            token = self._tokens.get(key)
+            if not self._is_fresh(token):
+                token = await self._credential.get_token(*scopes, **kwargs)
+                self._tokens[key] = token
+            return token
+    
+    async def close(self) -> None:
+        await self._credential.close()
 
 
 class AzureClients:
     """Manages Azure service clients and authentication."""
     
-    def __init__(self):
+    def __init__(self, settings: Optional[Settings] = None):
         """Initialize Azure clients with appropriate authentication."""
-        self.storage_account_name = os.getenv('AZURE_STORAGE_ACCOUNT_NAME')
-        self.storage_container_name = os.getenv('AZURE_STORAGE_CONTAINER_NAME')
-        self.output_container_name = os.getenv('AZURE_STORAGE_OUTPUT_CONTAINER')
-        self.doc_intel_endpoint = os.getenv('AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT')
-        self.doc_intel_key = os.getenv('AZURE_DOCUMENT_INTELLIGENCE_KEY')
+        self.settings = settings or Settings.from_env()
+        self.storage_account_name = self.settings.storage_account_name
+        self.storage_container_name = self.settings.storage_container_name
+        self.output_container_name = self.settings.output_container_name
+        self.doc_intel_endpoint = self.settings.doc_intel_endpoint
+        self.doc_intel_key = self.settings.doc_intel_key
         
         # Validate required environment variables
         self._validate_config()
         
         # Initialize credentials and clients
         self.credential = self._get_azure_credential()
+        self._http_session = self._get_http_session()
         self.blob_service_client = self._get_blob_service_client()
-        self.doc_intel_client = self._get_document_intelligence_client()
+        
+        # User delegation key for signing SAS URLs, fetched on first use
+        self._user_delegation_key: Optional[UserDelegationKey] = None
+        self._user_delegation_key_expiry: Optional[datetime] = None
+        self._user_delegation_key_lock = asyncio.Lock()
         
     def _validate_config(self) -> None:
         """Validate that all required configuration is present."""
-        required_vars = [
-            'AZURE_STORAGE_ACCOUNT_NAME',
-            'AZURE_STORAGE_CONTAINER_NAME', 
-            'AZURE_STORAGE_OUTPUT_CONTAINER',
-            'AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT',
-            'AZURE_DOCUMENT_INTELLIGENCE_KEY'
-        ]
-        
-        missing_vars = [var for var in required_vars if not os.getenv(var)]
+        missing_vars = [var for var, value in self.settings.required_values().items() if not value]
         
         if missing_vars:
             raise ValueError(f"Missing required environment variables: {', '.join(missing_vars)}")
             
-        # No need to check authentication variables - DefaultAzureCredential handles this
+        # No need to check authentication variables - the credential chain handles this
+    
+    def _get_azure_credential(self) -> CachedTokenCredential:
+        """Get an Azure credential chain limited to the configured authentication methods.
+        
+        Skips the DefaultAzureCredential probe chain (workload identity, IMDS, VS Code, ...)
+        so the first token is obtained without waiting on unused sources.
+        """
+        if self.settings.use_managed_identity:
+            logger.info("🔐 Using Managed Identity authentication (falls back to Azure CLI)")
+            return CachedTokenCredential(ChainedTokenCredential(ManagedIdentityCredential(), AzureCliCredential()))
+        
+        logger.info("🔐 Using Azure CLI authentication")
+        logger.info("    Make sure you've run 'az login' first")
+        # EnvironmentCredential picks up a service principal from AZURE_CLIENT_* variables when set
+        return CachedTokenCredential(ChainedTokenCredential(EnvironmentCredential(), AzureCliCredential()))
+    
+    def _get_http_session(self) -> aiohttp.ClientSession:
+        """Create the connection pool used by the Azure Storage client.
+        
+        Sized from HTTP_POOL_SIZE so concurrent downloads, copies and property checks do not
+        queue behind each other waiting for a free connection.
+        """
+        connector = aiohttp.TCPConnector(
+            limit=self.settings.http_pool_size,
+            limit_per_host=self.settings.http_pool_size
+        )
+        return aiohttp.ClientSession(connector=connector)
     
-    def _get_azure_credential(self):
-        """Get Azure credential using DefaultAzureCredential (Azure CLI authentication)."""
-        print("🔐 Using Azure CLI authentication (DefaultAzureCredential)")
-        print("    Make sure you've run 'az login' first")
-        return DefaultAzureCredential()
+    def _get_transport(self) -> AioHttpTransport:
+        """Get an SDK transport on the shared session; the session is closed by close()."""
+        return AioHttpTransport(session=self._http_session, session_owner=False)
     
     def _get_blob_service_client(self) -> BlobServiceClient:
-        """Initialize and return Azure Blob Storage client."""
+        """Initialize and return the async Azure Blob Storage client."""
         account_url = f"https://{self.storage_account_name}.blob.core.windows.net"
-        return BlobServiceClient(account_url=account_url, credential=self.credential)
-    
-    def _get_document_intelligence_client(self) -> DocumentIntelligenceClient:
-        """Initialize and return Azure Document Intelligence client."""
-        return DocumentIntelligenceClient(
-            endpoint=self.doc_intel_endpoint,
-            credential=AzureKeyCredential(self.doc_intel_key)
+        return BlobServiceClient(
+            account_url=account_url,
+            credential=self.credential,
+            transport=self._get_transport(),
+            max_single_get_size=BLOB_TRANSFER_CHUNK_SIZE,
+            max_chunk_get_size=BLOB_TRANSFER_CHUNK_SIZE,
+            max_block_size=BLOB_TRANSFER_CHUNK_SIZE,
+            max_single_put_size=BLOB_TRANSFER_CHUNK_SIZE
         )
     
-    def test_connections(self) -> bool:
+    async def __aenter__(self) -> "AzureClients":
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        await self.close()
+    
+    async def close(self) -> None:
+        """Close the Azure clients and release their HTTP connections."""
+        await self.blob_service_client.close()
+        await self.credential.close()
+        await self._http_session.close()
+    
+    async def test_connections(self) -> bool:
         """Test connections to all Azure services."""
         try:
-            print("🧪 Testing Azure Storage connection...")
-            # Test storage connection by listing containers
-            containers = []
-            container_names = []
-            for container in self.blob_service_client.list_containers():
-                containers.append(container)
-                container_names.append(container.name)
-                if len(containers) >= 10:  # Limit for performance
-                    break
+            logger.info("🧪 Testing Azure Storage connection...")
+            # Test storage connection with a single container listing
+            container_names = {container.name async for container in self.blob_service_client.list_containers()}
             
-            print(f"✅ Storage connection successful. Found {len(containers)}+ containers.")
+            logger.info("✅ Storage connection successful. Found %s containers.", len(container_names))
             
             # Check if required containers exist
             if self.storage_container_name not in container_names:
-                # Get all container names for error message
-                all_container_names = [c.name for c in self.blob_service_client.list_containers()]
-                print(f"⚠️  Source container '{self.storage_container_name}' not found. Available containers: {all_container_names}")
+                logger.warning("⚠️  Source container '%s' not found. Available containers: %s", self.storage_container_name, sorted(container_names))
                 return False
                 
             if self.output_container_name not in container_names:
-                # Get all container names for error message  
-                all_container_names = [c.name for c in self.blob_service_client.list_containers()]
-                print(f"⚠️  Output container '{self.output_container_name}' not found. Available containers: {all_container_names}")
+                logger.warning("⚠️  Output container '%s' not found. Available containers: %s", self.output_container_name, sorted(container_names))
                 return False
             
-            print("🧪 Testing Document Intelligence connection...")
-            # Test document intelligence connection
-            # We can't easily test without sending a document, so we'll just verify the client was created
-            if self.doc_intel_client:
-                print("✅ Document Intelligence client initialized successfully.")
+            # Document Intelligence is called over REST by PDFProcessor, which opens its
+            # connection on startup; there is nothing to test without sending a document
+            logger.info("✅ Document Intelligence endpoint configured: %s", self.doc_intel_endpoint)
             
             return True
             
         except Exception as e:
-            print(f"❌ Connection test failed: {str(e)}")
+            logger.error("❌ Connection test failed: %s", e)
             return False
     
+    async def get_blob_read_url(self, blob_client: BlobClient) -> str:
+        """Get a read-only SAS URL for a blob, signed with a user delegation key."""
+        user_delegation_key = await self._get_user_delegation_key()
+        sas_expiry = min(datetime.now(timezone.utc) + SAS_LIFETIME, self._user_delegation_key_expiry)
+        sas_token = generate_blob_sas(
+            account_name=self.storage_account_name,
+            container_name=blob_client.container_name,
+            blob_name=blob_client.blob_name,
+            user_delegation_key=user_delegation_key,
+            permission=BlobSasPermissions(read=True),
+            expiry=sas_expiry
+        )
+        return f"{blob_client.url}?{sas_token}"
+    
+    async def _get_user_delegation_key(self) -> UserDelegationKey:
+        """Get the cached user delegation key, requesting a new one when it nears expiry."""
+        async with self._user_delegation_key_lock:
+            now = datetime.now(timezone.utc)
+            if self._user_delegation_key is None or self._user_delegation_key_expiry - now < SAS_LIFETIME:
+                expiry = now + USER_DELEGATION_KEY_LIFETIME
+                # Start slightly in the past to tolerate clock skew with the service
+                self._user_delegation_key = await self.blob_service_client.get_user_delegation_key(
+                    key_start_time=now - timedelta(minutes=5),
+                    key_expiry_time=expiry
+                )
+                self._user_delegation_key_expiry = expiry
+            return self._user_delegation_key
+    
     def get_source_container_client(self):
         """Get the source container client."""
         return self.blob_service_client.get_container_client(self.storage_container_name)
@@ -0,0 +1,60 @@
+"""
+Application configuration module.
+Reads all settings from environment variables once at startup.
+"""
+
+import os
+from dataclasses import dataclass
+from typing import Dict, Optional
+from .utils import get_config_int
+
+
+@dataclass(frozen=True)
+class Settings:
+    """Immutable application settings loaded from the environment."""
+    
+    storage_account_name: Optional[str]
+    storage_container_name: Optional[str]
+    output_container_name: Optional[str]
+    source_prefix: Optional[str]
+    doc_intel_endpoint: Optional[str]
+    doc_intel_key: Optional[str]
+    use_managed_identity: bool
+    max_concurrent_operations: int
+    polling_interval: int
+    max_requests_per_second: int
+    http_pool_size: int
+    
+    @classmethod
+    def from_env(cls) -> "Settings":
+        """Build settings from the current environment variables."""
+        max_concurrent_operations = get_config_int('MAX_CONCURRENT_OPERATIONS', 5)
+        if max_concurrent_operations < 1:
+            raise ValueError(f"MAX_CONCURRENT_OPERATIONS must be at least 1, got {max_concurrent_operations}")
+        # Each file can hold several connections at once (ranged transfers plus polls)
+        http_pool_size = get_config_int('HTTP_POOL_SIZE', max_concurrent_operations * 4)
+        if http_pool_size < 1:
+            raise ValueError(f"HTTP_POOL_SIZE must be at least 1, got {http_pool_size}")
+        return cls(
+            storage_account_name=os.getenv('AZURE_STORAGE_ACCOUNT_NAME'),
+            storage_container_name=os.getenv('AZURE_STORAGE_CONTAINER_NAME'),
+            output_container_name=os.getenv('AZURE_STORAGE_OUTPUT_CONTAINER'),
+            source_prefix=os.getenv('AZURE_STORAGE_SOURCE_PREFIX') or None,
+            doc_intel_endpoint=os.getenv('AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT'),
+            doc_intel_key=os.getenv('AZURE_DOCUMENT_INTELLIGENCE_KEY'),
+            use_managed_identity=os.getenv('AZURE_USE_MANAGED_IDENTITY', 'false').lower() == 'true',
+            max_concurrent_operations=max_concurrent_operations,
+            polling_interval=get_config_int('POLLING_INTERVAL_SECONDS', 10),
+            max_requests_per_second=get_config_int('DOC_INTEL_MAX_RPS', 15),
+            http_pool_size=http_pool_size,
+        )
+    
+    def required_values(self) -> Dict[str, Optional[str]]:
+        """Map each required environment variable to its configured value."""
+        return {
+            'AZURE_STORAGE_ACCOUNT_NAME': self.storage_account_name,
+            'AZURE_STORAGE_CONTAINER_NAME': self.storage_container_name,
+            'AZURE_STORAGE_OUTPUT_CONTAINER': self.output_container_name,
+            'AZURE_DOCUMENT_INTELLIGENCE_ENDPOINT': self.doc_intel_endpoint,
+            'AZURE_DOCUMENT_INTELLIGENCE_KEY': self.doc_intel_key,
+        }
@@ -4,305 +4,683 @@ Handles the conversion of PDFs to searchable PDFs.
 """
 
 import io
+import os
+import json
 import time
+import logging
 import asyncio
-from typing import List, Tuple, Optional
-from concurrent.futures import ThreadPoolExecutor, as_completed
-from azure.ai.documentintelligence.models import AnalyzeDocumentRequest
-from azure.core.exceptions import HttpResponseError
-from .azure_client import AzureClients
+import tempfile
+from collections import OrderedDict
+from typing import IO, AsyncIterator, Dict, List, Tuple, Optional
+import httpx
+from azure.core.exceptions import HttpResponseError, ResourceNotFoundError
+from azure.storage.blob.aio import BlobClient
+try:
+    # orjson parses large analyze responses several times faster than the stdlib
+    from orjson import loads as json_loads
+except ImportError:
+    from json import loads as json_loads
+from .azure_client import AzureClients, BLOB_TRANSFER_CONCURRENCY
+from .config import Settings
 from .utils import (
     format_bytes, get_timestamp, get_output_filename, 
-    format_duration, ProgressTracker, retry_with_backoff,
-    get_config_int
+    format_duration, ProgressTracker, RateLimiter, AdaptiveConcurrencyLimiter, TransientHTTPError,
+    is_retryable_response, parse_retry_after, retry_with_backoff_async,
+    is_pdf_file
 )
 
 
+logger = logging.getLogger(__name__)
+
+
+# Timeout applied to each Document Intelligence REST request
+HTTP_TIMEOUT = httpx.Timeout(30.0)
+
+# Idle time before a pooled Document Intelligence connection is closed
+HTTP_KEEPALIVE_SECONDS = 60
+
+# Size of the chunks streamed from the PDF buffer into the analyze request body
+REQUEST_BODY_CHUNK_SIZE = 1024 * 1024
+
+# First wait of the adaptive OCR polling schedule (seconds); later waits double
+POLL_INITIAL_DELAY = 0.5
+
+# Total time to wait for a single OCR operation to finish
+OCR_TIMEOUT_SECONDS = 300
+
+# Below this many source files, probe each expected output with a HEAD request
+# instead of listing the whole output container
+EXISTS_PROBE_THRESHOLD = 1000
+
+# Concurrent HEAD requests used when probing for existing outputs
+EXISTS_PROBE_CONCURRENCY = 16
+
+# PDF header marker; readers accept it anywhere within the first 1024 bytes
+PDF_MAGIC = b'%PDF-'
+PDF_HEADER_PROBE_SIZE = 1024
+
+# Interval between status checks while a server-side blob copy is pending
+COPY_POLL_INTERVAL = 1.0
+
+# A server-side copy still pending after this long is aborted and the file fails
+COPY_TIMEOUT_SECONDS = 600
+
+# Blob clients kept per container for reuse; the least recently used are dropped past this
+# (clients share the container's transport, so dropping one closes nothing)
+BLOB_CLIENT_CACHE_SIZE = 256
+
+# Progress is reported after this many results or this many seconds, whichever comes first
+PROGRESS_BATCH_SIZE = 50
+PROGRESS_FLUSH_SECONDS = 2.0
+
+# PDFs up to this size are buffered in memory; larger ones are spooled to a temp file
+SPOOL_MAX_MEMORY_SIZE = 8 * 1024 * 1024
+
+# Local record of per-file results; files recorded as 'ok' for the same storage account
+# and output container are skipped on the next run
+CHECKPOINT_PATH = ".pdf_processor_state.jsonl"
+
+# Output blob metadata key holding the ETag of the source PDF it was produced from
+SOURCE_ETAG_METADATA_KEY = 'source_etag'
+
+# Error codes meaning Document Intelligence could not fetch the source URL; the
+# PDF is then downloaded and sent in the request body instead
+SOURCE_FETCH_ERROR_CODES = {'ContentSourceNotAccessible', 'InvalidContentSourceFormat'}
+
+
+class SourceNotAccessibleError(Exception):
+    """Raised when Document Intelligence cannot read a PDF from its SAS URL."""
+
+
+def _get_error_code(error_info: dict) -> Optional[str]:
+    """Get the most specific code from a Document Intelligence error object."""
+    inner_error = error_info.get('innererror') or {}
+    return inner_error.get('code') or error_info.get('code')
+
+
+def _parse_error_code(body: bytes) -> Optional[str]:
+    """Get the error code from a failed request's response body, if it has one."""
+    try:
+        return _get_error_code(json_loads(body).get('error') or {})
+    except (ValueError, AttributeError):
+        return None
+
+
+def parse_analyze_status(body: bytes) -> Tuple[str, Optional[str], Optional[str]]:
+    """Extract the status, error code and error message from an analyze operation response."""
+    result_data = json_loads(body)
+    error_info = result_data.get('error') or {}
+    return (result_data.get('status', 'unknown'), _get_error_code(error_info),
+            error_info.get('message', 'Unknown error'))
+
+
+def _create_pdf_buffer(size: int) -> IO[bytes]:
+    """Create a buffer for a downloaded PDF, spilling large files to disk."""
+    if size <= SPOOL_MAX_MEMORY_SIZE:
+        return io.BytesIO()
+    return tempfile.TemporaryFile()
+
+
+def _get_poll_delay(attempt: int, max_delay: float, retry_after: Optional[float] = None) -> float:
+    """Get the wait before the next status poll, preferring the server's Retry-After."""
+    if retry_after is not None:
+        return retry_after
+    return min(max_delay, POLL_INITIAL_DELAY * (2 ** attempt))
+
+
+def _is_transient_error(error: Exception) -> bool:
+    """Check whether a Document Intelligence request failure should be retried."""
+    return isinstance(error, (TransientHTTPError, httpx.TransportError))
+
+
+async def _iter_request_body(stream: IO[bytes]) -> AsyncIterator[bytes]:
+    """Stream a PDF buffer into a request body chunk by chunk."""
+    while True:
+        chunk = stream.read(REQUEST_BODY_CHUNK_SIZE)
+        if not chunk:
+            break
+        yield chunk
+
+
 class PDFProcessor:
     """Handles PDF processing using Azure Document Intelligence."""
     
-    def __init__(self, azure_clients: AzureClients):
+    def __init__(self, azure_clients: AzureClients, settings: Optional[Settings] = None):
         """Initialize PDF processor with Azure clients."""
         self.azure_clients = azure_clients
-        self.doc_intel_client = azure_clients.doc_intel_client
         self.source_container = azure_clients.get_source_container_client()
         self.output_container = azure_clients.get_output_container_client()
         
         # Configuration
-        self.max_concurrent_operations = get_config_int('MAX_CONCURRENT_OPERATIONS', 5)
-        self.polling_interval = get_config_int('POLLING_INTERVAL_SECONDS', 5)
+        settings = settings or azure_clients.settings
+        self.max_concurrent_operations = settings.max_concurrent_operations
+        self.polling_interval = settings.polling_interval
+        self.max_requests_per_second = settings.max_requests_per_second
+        self.source_prefix = settings.source_prefix
+        self.http_pool_size = settings.http_pool_size
+        
+        # Shared across all tasks so the combined request rate stays under the service quota
+        self.rate_limiter = RateLimiter(self.max_requests_per_second)
+        
+        # Adjusts the number of files in flight while process_all_pdfs runs
+        self._concurrency_limiter: Optional[AdaptiveConcurrencyLimiter] = None
+        
+        # Shared HTTP/2 client for Document Intelligence REST calls (created in __aenter__)
+        self._http_client: Optional[httpx.AsyncClient] = None
+        
+        # Blob sizes and ETags recorded from the discovery listing, keyed by blob name
+        self.pdf_sizes: Dict[str, int] = {}
+        self.pdf_etags: Dict[str, str] = {}
+        
+        # Blob clients reused across the header probe, analysis, existence checks and copy
+        self._source_blob_clients: "OrderedDict[str, BlobClient]" = OrderedDict()
+        self._output_blob_clients: "OrderedDict[str, BlobClient]" = OrderedDict()
+        
+        logger.info("🔧 Configured for %s concurrent operations", self.max_concurrent_operations)
+        logger.info("🔧 Maximum polling interval: %s seconds", self.polling_interval)
+        logger.info("🔧 Document Intelligence rate limit: %s requests/second", self.max_requests_per_second)
+    
+    async def __aenter__(self) -> "PDFProcessor":
+        # HTTP/2 multiplexes the POSTs and polls of all in-flight files over a few
+        # connections; the HTTP_POOL_SIZE limit only matters if the endpoint falls back to HTTP/1.1
+        limits = httpx.Limits(
+            max_connections=self.http_pool_size,
+            max_keepalive_connections=self.http_pool_size,
+            keepalive_expiry=HTTP_KEEPALIVE_SECONDS
+        )
+        self._http_client = httpx.AsyncClient(http2=True, limits=limits, timeout=HTTP_TIMEOUT)
+        await self._warm_up_connections()
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        if self._http_client is not None:
+            await self._http_client.aclose()
+            self._http_client = None
+    
+    async def _warm_up_connections(self) -> None:
+        """Open connections to Storage and Document Intelligence before the first file.
+        
+        DNS, TLS and the first token request are paid once here instead of by the
+        first batch of concurrent tasks. Failures are ignored; real requests report them.
+        """
+        await asyncio.gather(
+            self.source_container.get_container_properties(),
+            self._http_client.head(self.azure_clients.doc_intel_endpoint),
+            return_exceptions=True
+        )
+    
+    @staticmethod
+    def _get_cached_blob_client(cache: "OrderedDict[str, BlobClient]", container, blob_name: str) -> BlobClient:
+        """Get a blob client from a bounded LRU cache, creating it on first use."""
+        if blob_name in cache:
+            cache.move_to_end(blob_name)
+            return cache[blob_name]
         
-        print(f"🔧 Configured for {self.max_concurrent_operations} concurrent operations")
-        print(f"🔧 Polling interval: {self.polling_interval} seconds")
+        blob_client = cache[blob_name] = container.get_blob_client(blob_name)
+        if len(cache) > BLOB_CLIENT_CACHE_SIZE:
+            cache.popitem(last=False)
+        return blob_client
     
-    def discover_pdf_files(self) -> List[str]:
+    def _get_source_blob_client(self, blob_name: str) -> BlobClient:
+        """Get the client for a source blob, creating it on first use."""
+        return self._get_cached_blob_client(self._source_blob_clients, self.source_container, blob_name)
+    
+    def _get_output_blob_client(self, output_filename: str) -> BlobClient:
+        """Get the client for an output blob, creating it on first use."""
+        return self._get_cached_blob_client(self._output_blob_clients, self.output_container, output_filename)
+    
+    async def iter_pdf_blobs(self) -> AsyncIterator[Tuple[str, int, str]]:
+        """Yield the name, size and ETag of each PDF in the source container, page by page."""
+        # The listing already carries each blob's properties, so no per-file HEAD request is needed
+        async for blob in self.source_container.list_blobs(name_starts_with=self.source_prefix):
+            if is_pdf_file(blob.name):
+                yield blob.name, blob.size, blob.etag
+    
+    async def discover_pdf_files(self) -> List[str]:
         """Discover all PDF files in the source container."""
-        print("🔍 Discovering PDF files in storage container...")
+        logger.info("🔍 Discovering PDF files in storage container...")
+        if self.source_prefix:
+            logger.info("   Limiting to blobs under prefix '%s'", self.source_prefix)
         
         try:
-            blobs = list(self.source_container.list_blobs())
-            pdf_files = [blob.name for blob in blobs if blob.name.lower().endswith('.pdf')]
-            
-            print(f"📄 Found {len(pdf_files)} PDF files:")
-            for i, pdf_file in enumerate(pdf_files, 1):
-                blob_client = self.source_container.get_blob_client(pdf_file)
-                properties = blob_client.get_blob_properties()
-                size_str = format_bytes(properties.size)
-                print(f"   {i:2d}. {pdf_file} ({size_str})")
+            pdf_files = []
+            self.pdf_sizes = {}
+            self.pdf_etags = {}
+            async for name, size, etag in self.iter_pdf_blobs():
+                pdf_files.append(name)
+                self.pdf_sizes[name] = size
+                self.pdf_etags[name] = etag
+                logger.info("   %2d. %s (%s)", len(pdf_files), name, format_bytes(size))
             
+            logger.info("📄 Found %s PDF files (%s total)", len(pdf_files), format_bytes(sum(self.pdf_sizes.values())))
             return pdf_files
             
         except Exception as e:
-            print(f"❌ Error discovering PDF files: {str(e)}")
+            logger.error("❌ Error discovering PDF files: %s", e)
             raise
     
-    def process_single_pdf(self, blob_name: str) -> Tuple[bool, str]:
+    async def process_single_pdf(self, blob_name: str) -> Tuple[bool, str]:
         """Process a single PDF file."""
         try:
-            print(f"🔄 Starting processing: {blob_name}")
+            logger.info("🔄 Starting processing: %s", blob_name)
             
-            # Download the PDF from storage
-            blob_client = self.source_container.get_blob_client(blob_name)
-            pdf_data = blob_client.download_blob().readall()
+            blob_client = self._get_source_blob_client(blob_name)
             
-            print(f"📥 Downloaded {blob_name} ({format_bytes(len(pdf_data))})")
+            # Reject files that are not PDFs before spending an analyze call
+            if not await self._has_pdf_header(blob_client):
+                error_msg = f"Skipped {blob_name}: file does not start with a PDF header"
+                logger.error("❌ %s", error_msg)
+                return False, error_msg
             
-            # Process with Document Intelligence
-            searchable_pdf_data = self._process_with_document_intelligence(pdf_data, blob_name)
+            # Process with Document Intelligence; an OCR failure fails the file
+            await self._process_with_document_intelligence(blob_client, blob_name)
             
-            # Upload the processed PDF
             output_filename = get_output_filename(blob_name)
-            self._upload_processed_pdf(searchable_pdf_data, output_filename)
+            # Record which version of the source the output was made from
+            metadata = self._get_output_metadata(blob_name)
+            # The output is the unchanged original, so copy it server-side instead of re-uploading
+            await self._copy_source_pdf(blob_name, output_filename, metadata)
             
-            print(f"✅ Successfully processed: {blob_name} -> {output_filename}")
+            logger.info("✅ Successfully processed: %s -> %s", blob_name, output_filename)
             return True, f"Successfully processed {blob_name}"
             
         except Exception as e:
             error_msg = f"Failed to process {blob_name}: {str(e)}"
-            print(f"❌ {error_msg}")
+            logger.error("❌ %s", error_msg)
             return False, error_msg
     
-    def _process_with_document_intelligence(self, pdf_data: bytes, filename: str) -> bytes:
-        """Process PDF data with Azure Document Intelligence to create searchable PDF."""
-        print(f"🧠 Processing with Document Intelligence OCR: {filename}")
+    async def _has_pdf_header(self, blob_client) -> bool:
+        """Check the first bytes of a blob for the PDF header with a small ranged read."""
+        downloader = await blob_client.download_blob(offset=0, length=PDF_HEADER_PROBE_SIZE)
+        header = await downloader.readall()
+        return PDF_MAGIC in header
+    
+    async def _download_pdf(self, blob_client, blob_name: str) -> IO[bytes]:
+        """Stream a PDF from storage into a buffer instead of holding it all in memory."""
+        downloader = await blob_client.download_blob(max_concurrency=BLOB_TRANSFER_CONCURRENCY)
+        pdf_stream = _create_pdf_buffer(downloader.size)
+        try:
+            await downloader.readinto(pdf_stream)
+        except BaseException:
+            pdf_stream.close()
+            raise
+        
+        logger.info("📥 Downloaded %s (%s)", blob_name, format_bytes(pdf_stream.tell()))
+        return pdf_stream
+    
+    async def _process_with_document_intelligence(self, blob_client, filename: str) -> None:
+        """Run Azure Document Intelligence OCR on a PDF blob, raising if the analysis fails.
+        
+        The service reads the PDF straight from storage through a SAS URL; the file is
+        only downloaded and sent in the request body if the service cannot fetch it.
+        No searchable PDF is produced yet, so the original is kept as the output.
+        """
+        logger.info("🧠 Processing with Document Intelligence OCR: %s", filename)
+        
+        source_url = await self.azure_clients.get_blob_read_url(blob_client)
+        url_request = io.BytesIO(json.dumps({'urlSource': source_url}).encode('utf-8'))
         
         try:
-            # Use the REST API approach for OCR with PDF output
-            import requests
-            import time
+            await self._analyze_document(url_request, 'application/json', filename)
+        except SourceNotAccessibleError as e:
+            logger.warning("⚠️  Document Intelligence could not read %s from storage (%s), uploading it instead", filename, e)
+            with await self._download_pdf(blob_client, filename) as pdf_stream:
+                await self._analyze_document(pdf_stream, 'application/pdf', filename)
+        
+        logger.warning("⚠️  Note: Using original PDF (OCR analysis successful)")
+    
+    async def _analyze_document(self, request_body: IO[bytes], content_type: str, filename: str) -> None:
+        """Start a prebuilt-read analysis and poll until it completes."""
+        # Use the REST API approach for OCR with PDF output
+        endpoint_base = self.azure_clients.doc_intel_endpoint.rstrip('/')
+        api_key = self.azure_clients.doc_intel_key
+        
+        # Construct the analyze URL for prebuilt-read model
+        api_version = "2023-07-31"
+        analyze_url = f"{endpoint_base}/documentintelligence/documentModels/prebuilt-read:analyze?api-version={api_version}&outputContentFormat=pdf"
+        
+        headers = {
+            'Ocp-Apim-Subscription-Key': api_key,
+            'Content-Type': content_type
+        }
+        
+        # Start the analysis
+        logger.info("⏳ Starting OCR analysis for %s...", filename)
+        response, response_body = await self._send_request('POST', analyze_url, headers=headers, data=request_body)
+        status_code = response.status_code
+        operation_location = response.headers.get('operation-location')
+        
+        if status_code != 202:
+            if _parse_error_code(response_body) in SOURCE_FETCH_ERROR_CODES:
+                raise SourceNotAccessibleError(f"HTTP {status_code}")
+            error_msg = f"Failed to start OCR analysis: HTTP {status_code}"
+            if response_body:
+                error_msg += f" - {response_body.decode('utf-8', errors='replace')}"
+            raise Exception(error_msg)
+        
+        # Get the operation location for polling
+        if not operation_location:
+            raise Exception("No operation-location header in response")
+        
+        logger.info("⏳ OCR analysis initiated, polling for results...")
+        
+        # Poll for completion, backing off exponentially so short jobs finish quickly
+        deadline = time.monotonic() + OCR_TIMEOUT_SECONDS
+        retry_after = parse_retry_after(response.headers.get('Retry-After'))
+        attempts = 0
+        backoff_step = 0
+        previous_status = None
+        
+        while time.monotonic() < deadline:
+            await asyncio.sleep(_get_poll_delay(backoff_step, self.polling_interval, retry_after))
+            attempts += 1
+            backoff_step += 1
             
-            # Extract endpoint base URL and key
-            endpoint_base = self.doc_intel_client._endpoint.rstrip('/')
-            api_key = self.doc_intel_client._credential.key
+            poll_response, poll_body = await self._send_request('GET', operation_location, headers={
+                'Ocp-Apim-Subscription-Key': api_key
+            })
+            poll_status = poll_response.status_code
             
-            # Construct the analyze URL for prebuilt-read model
-            api_version = "2023-07-31"
-            analyze_url = f"{endpoint_base}/documentintelligence/documentModels/prebuilt-read:analyze?api-version={api_version}&outputContentFormat=pdf"
+            if poll_status != 200:
+                raise Exception(f"Failed to poll results: HTTP {poll_status}")
             
-            headers = {
-                'Ocp-Apim-Subscription-Key': api_key,
-                'Content-Type': 'application/pdf'
-            }
+            status, error_code, error_message = parse_analyze_status(poll_body)
+            retry_after = parse_retry_after(poll_response.headers.get('Retry-After'))
             
-            # Start the analysis
-            print(f"⏳ Starting OCR analysis for {filename}...")
-            response = requests.post(analyze_url, headers=headers, data=pdf_data, timeout=30)
+            logger.info("   Status: %s (poll %s)", status, attempts)
             
-            if response.status_code == 202:
-                # Get the operation location for polling
-                operation_location = response.headers.get('operation-location')
-                if not operation_location:
-                    raise Exception("No operation-location header in response")
-                
-                print(f"⏳ OCR analysis initiated, polling for results...")
-                
-                # Poll for completion
-                max_attempts = 60  # 5 minutes max (5 second intervals)
-                attempts = 0
-                
-                while attempts < max_attempts:
-                    time.sleep(self.polling_interval)
-                    attempts += 1
-                    
-                    poll_response = requests.get(operation_location, headers={
-                        'Ocp-Apim-Subscription-Key': api_key
-                    }, timeout=30)
-                    
-                    if poll_response.status_code == 200:
-                        result_data = poll_response.json()
-                        status = result_data.get('status', 'unknown')
-                        
-                        print(f"   Status: {status} (attempt {attempts}/{max_attempts})")
-                        
-                        if status == 'succeeded':
-                            # For PDF output, check the response structure
-                            print(f"✅ OCR analysis completed for {filename}")
-                            print(f"⚠️  Note: Using original PDF (OCR analysis successful)")
-                            # Return the original PDF as the analysis was successful
-                            # The actual searchable PDF functionality depends on the specific API response
-                            return pdf_data
-                            
-                        elif status == 'failed':
-                            error_info = result_data.get('error', {})
-                            error_message = error_info.get('message', 'Unknown error')
-                            raise Exception(f"OCR analysis failed: {error_message}")
-                        
-                        # Continue polling if status is 'running' or 'notStarted'
-                    else:
-                        raise Exception(f"Failed to poll results: HTTP {poll_response.status_code}")
-                
-                raise Exception(f"OCR analysis timed out after {max_attempts * self.polling_interval} seconds")
-                
-            else:
-                error_msg = f"Failed to start OCR analysis: HTTP {response.status_code}"
-                if response.text:
-                    error_msg += f" - {response.text}"
-                raise Exception(error_msg)
-                
-        except Exception as e:
-            print(f"❌ REST API approach failed: {str(e)}")
-            print(f"🔄 Falling back to SDK method for {filename}")
-            return self._fallback_process_with_sdk(pdf_data, filename)
-    
-    def _fallback_process_with_sdk(self, pdf_data: bytes, filename: str) -> bytes:
-        """Fallback method using SDK when REST API fails."""
-        print(f"🔄 Using SDK fallback for {filename}")
-        
-        try:
-            analyze_request = AnalyzeDocumentRequest(bytes_source=pdf_data)
+            if status == 'succeeded':
+                logger.info("✅ OCR analysis completed for %s", filename)
+                return
             
-            poller = self.doc_intel_client.begin_analyze_document(
-                "prebuilt-read",
-                analyze_request,
-                polling_interval=self.polling_interval
-            )
+            elif status == 'failed':
+                if error_code in SOURCE_FETCH_ERROR_CODES:
+                    raise SourceNotAccessibleError(error_message)
+                raise Exception(f"OCR analysis failed: {error_message}")
             
-            print(f"⏳ SDK analysis started for {filename}")
-            result = poller.result()
+            # Time spent queued says nothing about how long the analysis itself will take,
+            # so restart the schedule with short polls once it begins running
+            if status == 'running' and previous_status == 'notStarted':
+                backoff_step = 0
+            previous_status = status
             
-            if result and hasattr(result, 'content') and result.content:
-                print(f"✅ SDK analysis completed - extracted {len(result.content)} characters")
-                print(f"⚠️  Note: SDK method provides text only, returning original PDF")
-                # The SDK doesn't create searchable PDFs directly, so return original
-                return pdf_data
-            else:
-                print(f"⚠️  No content extracted, returning original PDF")
-                return pdf_data
-                
-        except Exception as e:
-            print(f"❌ SDK fallback also failed: {str(e)}")
-            print(f"⚠️  Returning original PDF unchanged")
-            return pdf_data
+            # Continue polling if status is 'running' or 'notStarted'
+        
+        raise Exception(f"OCR analysis timed out after {OCR_TIMEOUT_SECONDS} seconds")
     
-    def _upload_processed_pdf(self, pdf_data: bytes, output_filename: str) -> None:
-        """Upload processed PDF to output container."""
+    async def _send_request(self, method: str, url: str, data: Optional[IO[bytes]] = None,
+                            headers: Optional[dict] = None) -> Tuple[httpx.Response, bytes]:
+        """Send a rate-limited Document Intelligence request, retrying throttling and server errors."""
+        async def attempt() -> Tuple[httpx.Response, bytes]:
+            await self.rate_limiter.acquire()
+            request_headers = dict(headers or {})
+            content = None
+            if data is not None:
+                # Rewind the request body on every attempt; an explicit length avoids chunked encoding
+                request_headers['Content-Length'] = str(data.seek(0, io.SEEK_END))
+                data.seek(0)
+                content = _iter_request_body(data)
+            response = await self._http_client.request(method, url, content=content, headers=request_headers)
+            body = response.content
+            
+            if is_retryable_response(response.status_code, response.headers, body):
+                if response.status_code == 429 and self._concurrency_limiter is not None:
+                    await self._concurrency_limiter.record_throttle()
+                raise TransientHTTPError(
+                    response.status_code,
+                    f"{method} {response.url.path} returned HTTP {response.status_code}",
+                    retry_after=parse_retry_after(response.headers.get('Retry-After')),
+                    body=body
+                )
+            return response, body
+        
+        return await retry_with_backoff_async(attempt, is_retryable=_is_transient_error)
+    
+    def _get_output_metadata(self, blob_name: str) -> Dict[str, str]:
+        """Get the metadata stored on an output blob to tie it to its source version."""
+        etag = self.pdf_etags.get(blob_name)
+        return {SOURCE_ETAG_METADATA_KEY: etag} if etag else {}
+    
+    def _matches_source(self, blob_name: str, recorded_etag: Optional[str]) -> bool:
+        """Check whether an earlier result was produced from the current source version.
+        
+        Results without a recorded ETag predate the tracking and are treated as current.
+        """
+        current_etag = self.pdf_etags.get(blob_name)
+        return recorded_etag is None or current_etag is None or recorded_etag == current_etag
+    
+    async def _copy_source_pdf(self, blob_name: str, output_filename: str,
+                               metadata: Optional[Dict[str, str]] = None) -> None:
+        """Copy the original PDF to the output container with a server-side copy."""
         try:
-            output_blob_client = self.output_container.get_blob_client(output_filename)
+            source_url = await self.azure_clients.get_blob_read_url(self._get_source_blob_client(blob_name))
+            output_blob_client = self._get_output_blob_client(output_filename)
+            
+            copy_result = await output_blob_client.start_copy_from_url(source_url, metadata=metadata)
+            copy_status = copy_result['copy_status']
+            deadline = time.monotonic() + COPY_TIMEOUT_SECONDS
+            while copy_status == 'pending':
+                if time.monotonic() >= deadline:
+                    await output_blob_client.abort_copy(copy_result['copy_id'])
+                    raise Exception(f"copy still pending after {COPY_TIMEOUT_SECONDS} seconds and was aborted")
+                await asyncio.sleep(COPY_POLL_INTERVAL)
+                properties = await output_blob_client.get_blob_properties()
+                copy_status = properties.copy.status
             
-            # Upload with PDF content type
-            output_blob_client.upload_blob(
-                pdf_data,
-                blob_type="BlockBlob",
-                content_type="application/pdf",
-                overwrite=True
-            )
+            if copy_status != 'success':
+                raise Exception(f"copy finished with status '{copy_status}'")
             
-            print(f"📤 Uploaded processed PDF: {output_filename} ({format_bytes(len(pdf_data))})")
+            logger.info("📤 Copied original PDF server-side: %s", output_filename)
             
         except Exception as e:
-            raise Exception(f"Failed to upload {output_filename}: {str(e)}")
+            raise Exception(f"Failed to copy {blob_name} to {output_filename}: {str(e)}")
     
-    def process_all_pdfs(self, pdf_files: List[str]) -> None:
+    async def process_all_pdfs(self, pdf_files: List[str]) -> None:
         """Process all PDF files concurrently."""
         if not pdf_files:
-            print("📭 No PDF files to process.")
+            logger.info("📭 No PDF files to process.")
             return
         
-        print(f"\n🚀 Starting concurrent processing of {len(pdf_files)} PDF files...")
-        print(f"🔧 Using {self.max_concurrent_operations} concurrent operations")
+        logger.info("\n🚀 Starting concurrent processing of %s PDF files...", len(pdf_files))
+        
+        # Start below the configured maximum and let throttling feedback find the right level
+        self._concurrency_limiter = AdaptiveConcurrencyLimiter(self.max_concurrent_operations)
+        logger.info("🔧 Using up to %s concurrent operations (starting at %s)",
+                    self.max_concurrent_operations, self._concurrency_limiter.limit)
         
         progress_tracker = ProgressTracker(len(pdf_files), "PDF Processing")
         start_time = time.time()
         
-        # Process files concurrently
-        with ThreadPoolExecutor(max_workers=self.max_concurrent_operations) as executor:
-            # Submit all tasks
-            future_to_filename = {
-                executor.submit(self.process_single_pdf, pdf_file): pdf_file
-                for pdf_file in pdf_files
-            }
-            
-            # Collect results as they complete
-            for future in as_completed(future_to_filename):
-                filename = future_to_filename[future]
-                try:
-                    success, message = future.result()
-                    progress_tracker.update(failed=not success)
+        # A fixed set of workers pulls files in order, so only as many tasks exist as can
+        # run at once rather than one per file
+        remaining_files = iter(pdf_files)
+        completed: asyncio.Queue = asyncio.Queue()
+        
+        async def process_next() -> Optional[bool]:
+            """Process the next file once a slot is free; None when no files are left."""
+            filename = None
+            try:
+                async with self._concurrency_limiter:
+                    # Take the file only after the slot is granted, so files start in listing order
+                    filename = next(remaining_files, None)
+                    if filename is None:
+                        return None
+                    success, message = await self.process_single_pdf(filename)
+                
+                self._record_checkpoint(filename, success)
+                if success:
+                    await self._concurrency_limiter.record_success()
+                else:
+                    logger.warning("⚠️  Processing failed for %s: %s", filename, message)
+                return success
                     
-                    if not success:
-                        print(f"⚠️  Processing failed for {filename}: {message}")
-                        
-                except Exception as e:
-                    progress_tracker.update(failed=True)
-                    print(f"❌ Unexpected error processing {filename}: {str(e)}")
+            except Exception as e:
+                logger.error("❌ Unexpected error processing %s: %s", filename, e)
+                return False
+        
+        async def worker() -> None:
+            while True:
+                result = await process_next()
+                if result is None:
+                    return
+                completed.put_nowait(result)
+        
+        # At least one worker, like the concurrency limiter, so a non-positive setting cannot stall the run
+        worker_count = max(1, min(self.max_concurrent_operations, len(pdf_files)))
+        workers = [asyncio.create_task(worker()) for _ in range(worker_count)]
+        
+        # Report progress in batches rather than once per file
+        pending_results: List[bool] = []
+        last_flush = time.monotonic()
+        
+        for _ in range(len(pdf_files)):
+            pending_results.append(await completed.get())
+            
+            if len(pending_results) >= PROGRESS_BATCH_SIZE or time.monotonic() - last_flush >= PROGRESS_FLUSH_SECONDS:
+                progress_tracker.bulk_update(pending_results)
+                pending_results = []
+                last_flush = time.monotonic()
+        
+        if pending_results:
+            progress_tracker.bulk_update(pending_results)
+        await asyncio.gather(*workers)
         
         # Print final summary
         progress_tracker.finish()
         total_time = time.time() - start_time
         
-        print(f"\n🎉 Batch processing completed in {format_duration(total_time)}")
+        logger.info("\n🎉 Batch processing completed in %s", format_duration(total_time))
         if progress_tracker.completed_items > 0:
             avg_time = total_time / progress_tracker.completed_items
-            print(f"📊 Average processing time per file: {format_duration(avg_time)}")
+            logger.info("📊 Average processing time per file: %s", format_duration(avg_time))
     
-    def validate_output_container(self) -> bool:
+    async def validate_output_container(self) -> bool:
         """Validate that the output container exists and is accessible."""
         try:
             # Try to list blobs in the output container (get just one to test access)
-            blob_iter = iter(self.output_container.list_blobs())
-            try:
-                next(blob_iter)  # Try to get first blob, if any
-            except StopIteration:
-                pass  # Empty container is fine
+            async for _ in self.output_container.list_blobs():
+                break  # Empty container is fine
             
-            print(f"✅ Output container '{self.azure_clients.output_container_name}' is accessible")
+            logger.info("✅ Output container '%s' is accessible", self.azure_clients.output_container_name)
             return True
         except Exception as e:
-            print(f"❌ Cannot access output container '{self.azure_clients.output_container_name}': {str(e)}")
+            logger.error("❌ Cannot access output container '%s': %s", self.azure_clients.output_container_name, e)
             return False
     
-    def check_existing_files(self, pdf_files: List[str]) -> Tuple[List[str], List[str]]:
+    async def check_existing_files(self, pdf_files: List[str]) -> Tuple[List[str], List[str]]:
         """Check which files already exist in the output container."""
-        print("🔍 Checking for existing processed files...")
+        logger.info("🔍 Checking for existing processed files...")
         
         try:
-            # Get list of existing files in output container
-            existing_blobs = {blob.name for blob in self.output_container.list_blobs()}
+            # Files recorded in the local checkpoint need no round-trip to storage
+            checkpointed = self._load_checkpoint()
+            if checkpointed:
+                logger.info("   %s files recorded as processed in %s", len(checkpointed), CHECKPOINT_PATH)
+            
+            output_filenames = [get_output_filename(pdf_file) for pdf_file in pdf_files if pdf_file not in checkpointed]
+            existing_outputs = await self._find_existing_outputs(output_filenames)
             
             files_to_process = []
             files_already_processed = []
+            changed_files = []
             
             for pdf_file in pdf_files:
                 output_filename = get_output_filename(pdf_file)
-                if output_filename in existing_blobs:
+                if pdf_file in checkpointed:
+                    recorded_etag = checkpointed[pdf_file]
+                elif output_filename in existing_outputs:
+                    recorded_etag = existing_outputs[output_filename]
+                else:
+                    files_to_process.append(pdf_file)
+                    continue
+                
+                # An output made from an older version of the source is reprocessed
+                if self._matches_source(pdf_file, recorded_etag):
                     files_already_processed.append(pdf_file)
                 else:
+                    changed_files.append(pdf_file)
                     files_to_process.append(pdf_file)
             
+            if changed_files:
+                logger.info("🔄 %s files changed since they were last processed", len(changed_files))
+            
             if files_already_processed:
-                print(f"⏭️  Found {len(files_already_processed)} already processed files:")
+                logger.info("⏭️  Found %s already processed files:", len(files_already_processed))
                 for file in files_already_processed:
-                    print(f"     - {file}")
-                print("   (These will be skipped)")
+                    logger.info("     - %s", file)
+                logger.info("   (These will be skipped)")
             
             if files_to_process:
-                print(f"📋 {len(files_to_process)} files need processing")
+                logger.info("📋 %s files need processing", len(files_to_process))
             else:
-                print("✅ All files have already been processed!")
+                logger.info("✅ All files have already been processed!")
             
             return files_to_process, files_already_processed
             
         except Exception as e:
-            print(f"⚠️  Could not check existing files: {str(e)}")
-            print("   Proceeding to process all files...")
+            logger.warning("⚠️  Could not check existing files: %s", e)
+            logger.warning("   Proceeding to process all files...")
             return pdf_files, []
+    
+    def _load_checkpoint(self) -> Dict[str, Optional[str]]:
+        """Read the files recorded as processed into the current output container, with their source ETags.
+        
+        Entries written for another storage account or output container are ignored,
+        so pointing the run at a new container reprocesses everything.
+        """
+        account = self.azure_clients.storage_account_name
+        container = self.azure_clients.output_container_name
+        completed: Dict[str, Optional[str]] = {}
+        try:
+            with open(CHECKPOINT_PATH, 'r', encoding='utf-8') as checkpoint:
+                for line in checkpoint:
+                    try:
+                        entry = json_loads(line)
+                    except ValueError:
+                        continue  # A line cut short by an interrupted run
+                    if (entry.get('status') == 'ok' and entry.get('account') == account
+                            and entry.get('container') == container):
+                        completed[entry['name']] = entry.get('etag')
+        except FileNotFoundError:
+            pass
+        return completed
+    
+    def _record_checkpoint(self, blob_name: str, success: bool) -> None:
+        """Append a file's result to the checkpoint as a single line."""
+        entry = json.dumps({
+            'name': blob_name,
+            'account': self.azure_clients.storage_account_name,
+            'container': self.azure_clients.output_container_name,
+            'status': 'ok' if success else 'failed',
+            'etag': self.pdf_etags.get(blob_name),
+            'ts': get_timestamp()
+        })
+        with open(CHECKPOINT_PATH, 'a', encoding='utf-8') as checkpoint:
+            checkpoint.write(entry + '\n')
+    
+    async def _find_existing_outputs(self, output_filenames: List[str]) -> Dict[str, Optional[str]]:
+        """Map each expected output blob that already exists to its recorded source ETag."""
+        if len(output_filenames) >= EXISTS_PROBE_THRESHOLD:
+            # For large batches one paged listing is cheaper than a HEAD per file;
+            # restrict it to the outputs' shared prefix to skip unrelated blobs
+            common_prefix = os.path.commonprefix(output_filenames) or None
+            return {
+                blob.name: (blob.metadata or {}).get(SOURCE_ETAG_METADATA_KEY)
+                async for blob in self.output_container.list_blobs(name_starts_with=common_prefix, include=['metadata'])
+            }
+        
+        semaphore = asyncio.Semaphore(EXISTS_PROBE_CONCURRENCY)
+        
+        async def probe(output_filename: str) -> Optional[Dict[str, str]]:
+            async with semaphore:
+                try:
+                    properties = await self._get_output_blob_client(output_filename).get_blob_properties()
+                except ResourceNotFoundError:
+                    return None
+                return properties.metadata or {}
+        
+        results = await asyncio.gather(*(probe(name) for name in output_filenames))
+        return {
+            name: metadata.get(SOURCE_ETAG_METADATA_KEY)
+            for name, metadata in zip(output_filenames, results) if metadata is not None
+        }
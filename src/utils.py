@@ -4,17 +4,28 @@ Utility functions for the PDF processing application.
 
 import os
 import time
-from typing import List, Optional
+import logging
+import random
+import asyncio
+import threading
+from typing import Callable, List, Mapping, Optional
 from datetime import datetime
+from email.utils import parsedate_to_datetime
+from azure.core.exceptions import HttpResponseError
+
+
+logger = logging.getLogger(__name__)
+
+
+# Units used by format_bytes; each is 1024 (2**10) times the previous one
+BYTE_UNITS = ('B', 'KB', 'MB', 'GB', 'TB')
 
 
 def format_bytes(bytes_size: int) -> str:
     """Format bytes into human readable format."""
-    for unit in ['B', 'KB', 'MB', 'GB']:
-        if bytes_size < 1024.0:
-            return f"{bytes_size:.1f} {unit}"
-        bytes_size /= 1024.0
-    return f"{bytes_size:.1f} TB"
+    # The bit length gives the power of 1024 directly, without a division loop
+    unit_index = min(max(int(bytes_size).bit_length() - 1, 0) // 10, len(BYTE_UNITS) - 1)
+    return f"{bytes_size / (1 << (10 * unit_index)):.1f} {BYTE_UNITS[unit_index]}"
 
 
 def get_timestamp() -> str:
@@ -22,18 +33,20 @@ def get_timestamp() -> str:
     return datetime.now().isoformat()
 
 
+# Translation table replacing characters that are invalid in filenames with '_'
+SANITIZE_TABLE = str.maketrans({char: '_' for char in '<>:"/\\|?*'})
+
+
 def sanitize_filename(filename: str) -> str:
     """Sanitize filename for safe storage."""
-    # Remove or replace invalid characters
-    invalid_chars = '<>:"/\\|?*'
-    for char in invalid_chars:
-        filename = filename.replace(char, '_')
-    return filename
+    # Replace all invalid characters in a single pass
+    return filename.translate(SANITIZE_TABLE)
 
 
 def is_pdf_file(filename: str) -> bool:
     """Check if a file is a PDF based on its extension."""
-    return filename.lower().endswith('.pdf')
+    # Lower-case only the 4-character suffix rather than copying the whole name
+    return filename[-4:].lower() == '.pdf'
 
 
 def get_output_filename(input_filename: str, suffix: str = "_searchable") -> str:
@@ -94,7 +107,7 @@ def get_config_int(var_name: str, default_value: int) -> int:
     try:
         return int(value)
     except ValueError:
-        print(f"⚠️  Invalid value for {var_name}: '{value}'. Using default: {default_value}")
+        logger.warning("⚠️  Invalid value for %s: '%s'. Using default: %s", var_name, value, default_value)
         return default_value
 
 
@@ -107,6 +120,10 @@ def safe_print(message: str) -> None:
         print(message.encode('ascii', errors='replace').decode('ascii'))
 
 
+# Minimum time between progress lines printed by ProgressTracker.update
+PROGRESS_PRINT_INTERVAL_SECONDS = 1.0
+
+
 class ProgressTracker:
     """Track and display progress for long-running operations."""
     
@@ -116,15 +133,31 @@ class ProgressTracker:
         self.completed_items = 0
         self.failed_items = 0
         self.start_time = time.time()
+        # Print at most once per 1% step or per interval, whichever comes first
+        self._print_every = max(1, total_items // 100)
+        self._last_print = 0.0
+        self._lock = threading.Lock()
         
     def update(self, increment: int = 1, failed: bool = False) -> None:
-        """Update progress counter."""
-        if failed:
-            self.failed_items += increment
-        else:
-            self.completed_items += increment
+        """Update progress counter, printing only when the display is due."""
+        with self._lock:
+            if failed:
+                self.failed_items += increment
+            else:
+                self.completed_items += increment
             
-        self._print_progress()
+            total_processed = self.completed_items + self.failed_items
+            if (total_processed % self._print_every == 0 or total_processed >= self.total_items
+                    or time.time() - self._last_print >= PROGRESS_PRINT_INTERVAL_SECONDS):
+                self._print_progress()
+    
+    def bulk_update(self, results: List[bool]) -> None:
+        """Record a batch of results (True for success) and print progress once."""
+        succeeded = sum(results)
+        with self._lock:
+            self.completed_items += succeeded
+            self.failed_items += len(results) - succeeded
+            self._print_progress()
     
     def _print_progress(self) -> None:
         """Print current progress."""
@@ -141,28 +174,197 @@ class ProgressTracker:
             
         status = " | ".join(status_parts) if status_parts else "Starting..."
         
-        print(f"📊 {self.operation_name}: {total_processed}/{self.total_items} ({percentage:.1f}%) - {status} - {format_duration(elapsed_time)}")
+        logger.info("📊 %s: %s/%s (%.1f%%) - %s - %s", self.operation_name, total_processed, self.total_items,
+                    percentage, status, format_duration(elapsed_time))
+        self._last_print = time.time()
     
     def finish(self) -> None:
         """Print final summary."""
         total_time = time.time() - self.start_time
-        print(f"\n🏁 {self.operation_name} completed in {format_duration(total_time)}")
-        print(f"   ✅ Successful: {self.completed_items}")
-        print(f"   ❌ Failed: {self.failed_items}")
-        print(f"   📊 Total: {self.total_items}")
+        logger.info("\n🏁 %s completed in %s", self.operation_name, format_duration(total_time))
+        logger.info("   ✅ Successful: %s", self.completed_items)
+        logger.info("   ❌ Failed: %s", self.failed_items)
+        logger.info("   📊 Total: %s", self.total_items)
+
+
+class RateLimiter:
+    """Enforce a minimum interval between requests shared by concurrent tasks."""
+    
+    def __init__(self, max_requests_per_second: float):
+        self.min_interval = 1.0 / max_requests_per_second if max_requests_per_second > 0 else 0.0
+        self._lock = asyncio.Lock()
+        self._last_request_time = 0.0
+        
+    async def acquire(self) -> None:
+        """Wait until the next request is allowed to start."""
+        async with self._lock:
+            now = time.monotonic()
+            wait_time = self._last_request_time + self.min_interval - now
+            if wait_time > 0:
+                await asyncio.sleep(wait_time)
+                now = time.monotonic()
+            self._last_request_time = now
+
 
+class AdaptiveConcurrencyLimiter:
+    """Concurrency limit tuned by additive increase / multiplicative decrease.
+    
+    Starts at half the maximum, grows by one slot after a run of successes and
+    halves whenever the service throttles, so parallelism settles near capacity.
+    """
+    
+    def __init__(self, max_limit: int, increase_after: int = 10):
+        self.max_limit = max(1, max_limit)
+        self.limit = min(self.max_limit, max(2, self.max_limit // 2))
+        self.increase_after = increase_after
+        self._in_flight = 0
+        self._successes = 0
+        self._condition = asyncio.Condition()
+    
+    async def __aenter__(self) -> "AdaptiveConcurrencyLimiter":
+        async with self._condition:
+            await self._condition.wait_for(lambda: self._in_flight < self.limit)
+            self._in_flight += 1
+        return self
+    
+    async def __aexit__(self, *exc_info) -> None:
+        async with self._condition:
+            self._in_flight -= 1
+            self._condition.notify_all()
+    
+    async def record_success(self) -> None:
+        """Count a successful operation, adding a slot after enough in a row."""
+        async with self._condition:
+            self._successes += 1
+            if self._successes >= self.increase_after and self.limit < self.max_limit:
+                self.limit += 1
+                self._successes = 0
+                logger.info("📈 Increasing concurrency to %s", self.limit)
+                self._condition.notify_all()
+    
+    async def record_throttle(self) -> None:
+        """Halve the limit after a throttling response."""
+        async with self._condition:
+            self._successes = 0
+            # Requests started under the old limit may also be throttled; only react once they drain
+            if self._in_flight <= self.limit and self.limit > 1:
+                self.limit = max(1, self.limit // 2)
+                logger.warning("📉 Throttled by the service, reducing concurrency to %s", self.limit)
+
+
+# HTTP status codes that indicate throttling or a transient service failure
+RETRYABLE_STATUS_CODES = {429, 500, 502, 503, 504}
+
+# Error message fragments that indicate throttling regardless of status code
+RETRYABLE_ERROR_MARKERS = ('rate limit', 'quota')
+
+# HTTP status codes that will fail the same way on every attempt
+FATAL_STATUS_CODES = {400, 401, 403, 404}
+
+
+class TransientHTTPError(Exception):
+    """Raised for an HTTP response that is worth retrying; the service's error body is kept in the message."""
+    
+    def __init__(self, status_code: int, message: str, retry_after: Optional[float] = None, body: bytes = b""):
+        if body:
+            message += f" - {body.decode('utf-8', errors='replace')}"
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+        self.body = body
 
-def retry_with_backoff(func, max_retries: int = 3, base_delay: float = 1.0):
-    """Retry a function with exponential backoff."""
+
+def _has_retryable_marker(error_text: str) -> bool:
+    """Check an error message for throttling wording such as 'rate limit' or 'quota'."""
+    error_text = error_text.lower()
+    return any(marker in error_text for marker in RETRYABLE_ERROR_MARKERS)
+
+
+def is_retryable_response(status_code: int, headers: Mapping[str, str], body: bytes = b"") -> bool:
+    """Check whether a failed HTTP response is throttling or a transient server error."""
+    if status_code < 400:
+        return False
+    if status_code in RETRYABLE_STATUS_CODES or 'Retry-After' in headers:
+        return True
+    return _has_retryable_marker(body.decode('utf-8', errors='ignore'))
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Parse a Retry-After header given either in seconds or as an HTTP date."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    return max(0.0, retry_at.timestamp() - time.time())
+
+
+def is_fatal_error(error: Exception) -> bool:
+    """Check whether an error is a client error that retrying cannot fix.
+    
+    Throttling reported with a client status, such as a 403 quota error, is not fatal.
+    """
+    # The response body was already checked when the error was raised
+    if isinstance(error, TransientHTTPError):
+        return False
+    if getattr(error, 'status_code', None) not in FATAL_STATUS_CODES:
+        return False
+    return not _has_retryable_marker(str(error))
+
+
+def _get_retry_delay(error: Exception, attempt: int, base_delay: float, max_delay: float) -> float:
+    """Get the delay before the next attempt, preferring the server's Retry-After."""
+    retry_after = getattr(error, 'retry_after', None)
+    if retry_after is None and isinstance(error, HttpResponseError) and error.response is not None:
+        retry_after = parse_retry_after(error.response.headers.get('Retry-After'))
+    if retry_after is not None:
+        return retry_after
+    # Jitter spreads out concurrent tasks that were throttled at the same moment
+    return min(max_delay, base_delay * (2 ** attempt) * random.uniform(0.5, 1.5))
+
+
+def _should_retry(error: Exception, attempt: int, max_retries: int,
+                  is_retryable: Optional[Callable[[Exception], bool]]) -> bool:
+    """Decide whether a failed attempt should be retried."""
+    if attempt == max_retries - 1 or is_fatal_error(error):
+        return False
+    return is_retryable is None or is_retryable(error)
+
+
+def retry_with_backoff(func, max_retries: int = 3, base_delay: float = 1.0,
+                       max_delay: float = 60.0, is_retryable: Optional[Callable[[Exception], bool]] = None):
+    """Retry a function with exponential backoff, failing fast on fatal client errors."""
     for attempt in range(max_retries):
         try:
             return func()
         except Exception as e:
-            if attempt == max_retries - 1:
+            if not _should_retry(e, attempt, max_retries, is_retryable):
                 raise e
             
-            delay = base_delay * (2 ** attempt)
-            print(f"⚠️  Attempt {attempt + 1} failed: {str(e)}. Retrying in {delay:.1f} seconds...")
+            delay = _get_retry_delay(e, attempt, base_delay, max_delay)
+            logger.warning("⚠️  Attempt %s failed: %s. Retrying in %.1f seconds...", attempt + 1, e, delay)
             time.sleep(delay)
     
     return None
+
+
+async def retry_with_backoff_async(func, max_retries: int = 3, base_delay: float = 1.0,
+                                   max_delay: float = 60.0, is_retryable: Optional[Callable[[Exception], bool]] = None):
+    """Retry a coroutine function with exponential backoff, failing fast on fatal client errors."""
+    for attempt in range(max_retries):
+        try:
+            return await func()
+        except Exception as e:
+            if not _should_retry(e, attempt, max_retries, is_retryable):
+                raise e
+            
+            delay = _get_retry_delay(e, attempt, base_delay, max_delay)
+            logger.warning("⚠️  Attempt %s failed: %s. Retrying in %.1f seconds...", attempt + 1, e, delay)
+            await asyncio.sleep(delay)
+    
+    return None
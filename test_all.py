@@ -1,47 +1,52 @@
 #!/usr/bin/env python3
 """
 Comprehensive test runner for all Azure Document Intelligence PDF Processor components.
-This script runs all tests in sequence and provides a complete status report.
+This script runs all tests in parallel and provides a complete status report.
 """
 
 import sys
 import subprocess
 import time
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
 
 
 def run_test(test_name, script_name, description):
-    """Run a single test and return the result."""
-    print(f"\n{'='*60}")
-    print(f"🧪 Running {test_name}")
-    print(f"   {description}")
-    print('='*60)
-    
+    """Run a single test and return its result and captured output."""
     start_time = time.time()
     
     try:
+        # Output is captured so concurrently running tests do not interleave on the console
         result = subprocess.run([sys.executable, script_name], 
-                              capture_output=False, 
+                              capture_output=True, 
                               text=True, 
                               timeout=120)  # 2 minute timeout
         
         duration = time.time() - start_time
+        output = result.stdout + result.stderr
         
         if result.returncode == 0:
-            print(f"\n✅ {test_name} PASSED ({duration:.1f}s)")
-            return True, duration, None
+            return True, duration, None, output, f"✅ {test_name} PASSED ({duration:.1f}s)"
         else:
-            print(f"\n❌ {test_name} FAILED ({duration:.1f}s)")
-            return False, duration, f"Exit code: {result.returncode}"
+            return False, duration, f"Exit code: {result.returncode}", output, f"❌ {test_name} FAILED ({duration:.1f}s)"
             
-    except subprocess.TimeoutExpired:
-        print(f"\n⏰ {test_name} TIMEOUT")
-        return False, 120, "Test timed out after 2 minutes"
+    except subprocess.TimeoutExpired as e:
+        output = (e.stdout or b"").decode('utf-8', errors='replace') if isinstance(e.stdout, bytes) else (e.stdout or "")
+        return False, 120, "Test timed out after 2 minutes", output, f"⏰ {test_name} TIMEOUT"
         
     except Exception as e:
         duration = time.time() - start_time
-        print(f"\n💥 {test_name} ERROR ({duration:.1f}s)")
-        return False, duration, str(e)
+        return False, duration, str(e), "", f"💥 {test_name} ERROR ({duration:.1f}s)"
+
+
+def print_test_output(test_name, description, output, summary):
+    """Print the buffered output of a finished test."""
+    print(f"\n{'='*60}")
+    print(f"🧪 {test_name}")
+    print(f"   {description}")
+    print('='*60)
+    print(output.rstrip())
+    print(f"\n{summary}")
 
 
 def main():
@@ -58,17 +63,21 @@ def main():
         ("Document Intelligence", "test_document_intelligence.py", "Tests Azure Document Intelligence service connectivity"),
     ]
     
-    # Run all tests
+    # The tests share no state, so run them all at once; the suite takes as long as the slowest
     results = []
-    total_duration = 0
+    suite_start = time.time()
+    print(f"🚀 Running {len(tests)} tests in parallel...")
     
-    for test_name, script_name, description in tests:
-        passed, duration, error = run_test(test_name, script_name, description)
-        results.append((test_name, passed, duration, error))
-        total_duration += duration
+    with ThreadPoolExecutor(max_workers=len(tests)) as executor:
+        futures = [executor.submit(run_test, *test) for test in tests]
         
-        # Small delay between tests
-        time.sleep(1)
+        # Print each test's output in the defined order as soon as it is available
+        for (test_name, _, description), future in zip(tests, futures):
+            passed, duration, error, output, summary = future.result()
+            print_test_output(test_name, description, output, summary)
+            results.append((test_name, passed, duration, error))
+    
+    total_duration = time.time() - suite_start
     
     # Generate comprehensive report
     print(f"\n{'='*80}")
@@ -6,10 +6,19 @@ This script tests Azure CLI authentication (requires 'az login' to be run first)
 
 import os
 import sys
-import subprocess
+import json
+import base64
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
+from azure.identity import AzureCliCredential, CredentialUnavailableError, DefaultAzureCredential
 from azure.core.exceptions import ClientAuthenticationError
+from azure.mgmt.resource import SubscriptionClient
+
+
+def decode_token_claims(access_token):
+    """Decode the claims of a JWT access token without verifying it (display only)."""
+    payload = access_token.split('.')[1]
+    payload += '=' * (-len(payload) % 4)
+    return json.loads(base64.urlsafe_b64decode(payload))
 
 
 def check_azure_cli():
@@ -17,42 +26,38 @@ def check_azure_cli():
     print("� Checking Azure CLI status...")
     
     try:
-        # Check if Azure CLI is installed
-        result = subprocess.run(['az', '--version'], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode != 0:
-            print("❌ Azure CLI is not installed or not working")
-            print("   Please install Azure CLI: https://docs.microsoft.com/en-us/cli/azure/install-azure-cli")
-            return False
-        
-        print("✅ Azure CLI is installed")
+        # A token request through the CLI proves it is installed and logged in in one step
+        credential = AzureCliCredential()
+        token = credential.get_token("https://management.azure.com/.default")
+        print("✅ Azure CLI is installed and logged in")
         
-        # Check if user is logged in
-        result = subprocess.run(['az', 'account', 'show'], 
-                              capture_output=True, text=True, timeout=10)
-        if result.returncode != 0:
-            print("❌ Not logged in to Azure CLI")
-            print("   Please run: az login")
-            return False
+        # The token itself carries the account and tenant
+        claims = decode_token_claims(token.token)
+        print(f"✅ Logged in as: {claims.get('upn') or claims.get('unique_name') or claims.get('appid', 'Unknown')}")
+        tenant_id = claims.get('tid', 'Unknown')
         
-        # Parse the account info
-        import json
-        account_info = json.loads(result.stdout)
-        print(f"✅ Logged in as: {account_info.get('user', {}).get('name', 'Unknown')}")
-        print(f"   Subscription: {account_info.get('name', 'Unknown')} ({account_info.get('id', 'Unknown')})")
-        print(f"   Tenant: {account_info.get('tenantId', 'Unknown')}")
+        # The CLI token also lists the subscriptions the login can reach in that tenant
+        subscriptions = [
+            subscription for subscription in SubscriptionClient(credential).subscriptions.list()
+            if subscription.tenant_id == tenant_id
+        ]
+        if subscriptions:
+            for subscription in subscriptions:
+                print(f"   Subscription: {subscription.display_name} ({subscription.subscription_id})")
+        else:
+            print("   Subscription: Unknown")
+        print(f"   Tenant: {tenant_id}")
         
         return True
         
-    except subprocess.TimeoutExpired:
-        print("❌ Azure CLI command timed out")
-        return False
-    except FileNotFoundError:
-        print("❌ Azure CLI is not installed")
-        print("   Please install Azure CLI: https://docs.microsoft.com/en-us/cli/azure/install-azure-cli")
+    except CredentialUnavailableError as e:
+        print("❌ Azure CLI is not installed or not logged in")
+        print(f"   {str(e)}")
+        print("   Install Azure CLI: https://docs.microsoft.com/en-us/cli/azure/install-azure-cli")
+        print("   Then run: az login")
         return False
-    except json.JSONDecodeError:
-        print("❌ Could not parse Azure CLI output")
+    except (ValueError, IndexError):
+        print("❌ Could not parse Azure CLI account details")
         return False
     except Exception as e:
         print(f"❌ Error checking Azure CLI: {str(e)}")
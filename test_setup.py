@@ -4,10 +4,61 @@ Test script to verify the Azure Document Intelligence PDF Processor setup.
 This script checks if all dependencies are properly installed and configurations are valid.
 """
 
+import io
 import sys
 import os
+import importlib
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 
+
+# Banner separator line
+SEPARATOR = "=" * 60
+
+
+class ThreadOutputCapture:
+    """Stdout proxy that sends each worker thread's prints to its own buffer."""
+    
+    def __init__(self, stream):
+        self.stream = stream
+        self._local = threading.local()
+    
+    def write(self, text):
+        return getattr(self._local, 'buffer', self.stream).write(text)
+    
+    def flush(self):
+        self.stream.flush()
+    
+    def __getattr__(self, name):
+        return getattr(self.stream, name)
+    
+    def run(self, test_name, test_func):
+        """Run a test in the current thread, returning its result and captured output."""
+        self._local.buffer = io.StringIO()
+        try:
+            passed = test_func()
+        except Exception as e:
+            print(f"❌ Test '{test_name}' failed with exception: {str(e)}")
+            passed = False
+        finally:
+            output = self._local.buffer.getvalue()
+            del self._local.buffer
+        return passed, output
+
+
+def configure_logging(stream):
+    """Send the application's log records (progress, warnings) to the given stream as plain messages."""
+    handler = logging.StreamHandler(stream)
+    handler.setFormatter(logging.Formatter("%(message)s"))
+    
+    app_logger = logging.getLogger("src")
+    app_logger.addHandler(handler)
+    app_logger.setLevel(logging.INFO)
+    app_logger.propagate = False
+
+
 def test_imports():
     """Test if all required packages can be imported."""
     print("🧪 Testing Python package imports...")
@@ -17,14 +68,19 @@ def test_imports():
         ("azure.storage.blob", "BlobServiceClient"),
         ("azure.ai.documentintelligence", "DocumentIntelligenceClient"),
         ("azure.core.credentials", "AzureKeyCredential"),
-        ("dotenv", "load_dotenv")
+        ("dotenv", "load_dotenv"),
+        ("aiohttp", "ClientSession"),
+        ("httpx", "AsyncClient"),
+        ("h2.connection", "H2Connection"),  # HTTP/2 support for httpx (httpx[http2])
+        ("orjson", "loads"),
+        ("azure.mgmt.resource", "SubscriptionClient")  # Subscription display in test_auth.py
     ]
     
     failed_imports = []
     
     for package_name, class_name in required_packages:
         try:
-            module = __import__(package_name, fromlist=[class_name])
+            module = importlib.import_module(package_name)
             getattr(module, class_name)
             print(f"  ✅ {package_name}.{class_name}")
         except ImportError as e:
@@ -55,16 +111,23 @@ def test_environment_file():
     
     # Check if .env file has content
     try:
+        # Stream the file once, counting non-comment, non-empty lines as we go
+        has_content = False
+        config_lines = 0
         with open(env_file, 'r') as f:
-            content = f.read().strip()
-            if not content:
-                print("⚠️  .env file is empty")
-                return False
-            
-            # Count non-comment, non-empty lines
-            config_lines = [line for line in content.split('\n') 
-                          if line.strip() and not line.strip().startswith('#')]
-            print(f"✅ .env file has {len(config_lines)} configuration lines")
+            for line in f:
+                stripped = line.strip()
+                if not stripped:
+                    continue
+                has_content = True
+                if not stripped.startswith('#'):
+                    config_lines += 1
+        
+        if not has_content:
+            print("⚠️  .env file is empty")
+            return False
+        
+        print(f"✅ .env file has {config_lines} configuration lines")
             
     except Exception as e:
         print(f"❌ Error reading .env file: {str(e)}")
@@ -84,14 +147,24 @@ def test_project_structure():
         ".env.example",
         "src/__init__.py",
         "src/azure_client.py",
+        "src/config.py",
         "src/pdf_processor.py",
         "src/utils.py"
     ]
     
     missing_files = []
     
+    # List each directory's names once instead of stat-ing every file
+    dir_entries = {}
+    for parent in {os.path.dirname(file_path) or '.' for file_path in required_files}:
+        try:
+            dir_entries[parent] = set(os.listdir(parent))
+        except OSError:
+            dir_entries[parent] = set()
+    
     for file_path in required_files:
-        if Path(file_path).exists():
+        parent, name = os.path.split(file_path)
+        if name in dir_entries[parent or '.']:
             print(f"  ✅ {file_path}")
         else:
             print(f"  ❌ {file_path}")
@@ -132,31 +205,77 @@ def test_basic_functionality():
         print(f"❌ Basic functionality test failed: {str(e)}")
         return False
 
+def test_processing_order():
+    """Test that files start processing in listing order."""
+    print("\n🧪 Testing processing order...")
+    
+    try:
+        sys.path.insert(0, os.getcwd())
+        import asyncio
+        import random
+        from src.pdf_processor import PDFProcessor
+        
+        pdf_files = [f"document_{i:02d}.pdf" for i in range(40)]
+        started = []
+        
+        async def fake_process_single_pdf(filename):
+            started.append(filename)
+            await asyncio.sleep(random.uniform(0, 0.01))
+            return True, "ok"
+        
+        # No Azure clients are needed: processing and checkpointing are replaced on the instance
+        processor = PDFProcessor.__new__(PDFProcessor)
+        processor.max_concurrent_operations = 8
+        processor.process_single_pdf = fake_process_single_pdf
+        processor._record_checkpoint = lambda filename, success: None
+        
+        asyncio.run(processor.process_all_pdfs(pdf_files))
+        
+        assert started == pdf_files, f"files started out of order: {started}"
+        
+        print("✅ Files started in listing order!")
+        return True
+        
+    except Exception as e:
+        print(f"❌ Processing order test failed: {str(e)}")
+        return False
+
 def main():
     """Run all tests."""
     print("🔧 Azure Document Intelligence PDF Processor - Setup Test")
-    print("=" * 60)
+    print(SEPARATOR)
     
     tests = [
         ("Package Imports", test_imports),
         ("Environment File", test_environment_file),
         ("Project Structure", test_project_structure),
-        ("Basic Functionality", test_basic_functionality)
+        ("Basic Functionality", test_basic_functionality),
+        ("Processing Order", test_processing_order)
     ]
     
     passed_tests = 0
     total_tests = len(tests)
     
-    for test_name, test_func in tests:
-        print(f"\n--- {test_name} ---")
-        try:
-            if test_func():
-                passed_tests += 1
-        except Exception as e:
-            print(f"❌ Test '{test_name}' failed with exception: {str(e)}")
+    # The checks are independent, so run them together; each one's output is
+    # buffered and printed in order so the reports do not interleave
+    capture = ThreadOutputCapture(sys.stdout)
+    sys.stdout = capture
+    # Logged progress goes through the capture too, so it lands in the report of the test that produced it
+    configure_logging(capture)
+    try:
+        with ThreadPoolExecutor(max_workers=total_tests) as executor:
+            futures = [executor.submit(capture.run, test_name, test_func) for test_name, test_func in tests]
+            
+            for (test_name, _), future in zip(tests, futures):
+                passed, output = future.result()
+                print(f"\n--- {test_name} ---")
+                print(output, end='')
+                if passed:
+                    passed_tests += 1
+    finally:
+        sys.stdout = capture.stream
     
-    print(f"\n{'='*60}")
-    print(f"🏁 Test Results: {passed_tests}/{total_tests} tests passed")
+    print(f"\n{SEPARATOR}\n🏁 Test Results: {passed_tests}/{total_tests} tests passed")
     
     if passed_tests == total_tests:
         print("🎉 All tests passed! Your setup is ready.")
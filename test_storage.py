@@ -6,22 +6,66 @@ This script tests connectivity to Azure Storage and validates container access.
 
 import os
 import sys
+import functools
+import itertools
+from concurrent.futures import ThreadPoolExecutor
 from dotenv import load_dotenv
-from azure.identity import DefaultAzureCredential
-from azure.storage.blob import BlobServiceClient
 from azure.core.exceptions import ResourceNotFoundError, ClientAuthenticationError
 
 
+# Banner separator line
+SEPARATOR = "=" * 60
+
+# Template for one line of the test summary
+SUMMARY_LINE = "   {name}: {status}"
+
+# Bytes per MiB, for sample file sizes
+MIB = 1 << 20
+
+# Number of source PDFs to list as a sample
+PDF_SAMPLE_SIZE = 5
+
+# Storage settings checked by the configuration test, in unpacking order
+STORAGE_ENV_VARS = (
+    'AZURE_STORAGE_ACCOUNT_NAME',
+    'AZURE_STORAGE_CONTAINER_NAME',
+    'AZURE_STORAGE_OUTPUT_CONTAINER',
+)
+
+
+@functools.lru_cache(maxsize=None)
+def get_credential():
+    """Get the credential shared by all tests, so its token cache is reused."""
+    from azure.identity import DefaultAzureCredential
+    return DefaultAzureCredential()
+
+
+@functools.lru_cache(maxsize=None)
+def get_blob_service_client(storage_account):
+    """Get the storage client shared by all tests for this account."""
+    # Deferred so a run that stops at the configuration check never loads the SDK
+    from azure.storage.blob import BlobServiceClient
+    account_url = f"https://{storage_account}.blob.core.windows.net"
+    return BlobServiceClient(account_url=account_url, credential=get_credential())
+
+
+@functools.lru_cache(maxsize=1)
+def load_environment_once():
+    """Load the .env file on first use; later calls are no-ops."""
+    load_dotenv()
+    return True
+
+
 def test_storage_configuration():
     """Test if storage configuration is present and valid."""
     print("🔍 Validating Storage Configuration...")
     
     # Load environment variables
-    load_dotenv()
+    load_environment_once()
     
-    storage_account = os.getenv('AZURE_STORAGE_ACCOUNT_NAME')
-    source_container = os.getenv('AZURE_STORAGE_CONTAINER_NAME')
-    output_container = os.getenv('AZURE_STORAGE_OUTPUT_CONTAINER')
+    storage_account, source_container, output_container = (
+        os.environ.get(name) for name in STORAGE_ENV_VARS
+    )
     
     issues = []
     
@@ -60,19 +104,14 @@ def test_storage_authentication():
         if not config_ok:
             return False, None
         
-        # Create credential and storage client
-        credential = DefaultAzureCredential()
-        account_url = f"https://{storage_account}.blob.core.windows.net"
-        blob_service_client = BlobServiceClient(account_url=account_url, credential=credential)
+        # Reuse the shared credential and storage client
+        blob_service_client = get_blob_service_client(storage_account)
         
-        print(f"🧪 Connecting to: {account_url}")
+        print(f"🧪 Connecting to: {blob_service_client.url.rstrip('/')}")
         
-        # Test basic connectivity by listing containers
-        containers = []
-        for container in blob_service_client.list_containers():
-            containers.append(container)
-            if len(containers) >= 5:  # Limit to first 5 containers
-                break
+        # Test basic connectivity with a single request for the first 5 containers
+        pages = blob_service_client.list_containers(results_per_page=5).by_page()
+        containers = list(next(pages, []))
         
         container_names = [container.name for container in containers]
         
@@ -91,53 +130,83 @@ def test_storage_authentication():
         return False, None
 
 
-def test_container_access(blob_service_client, container_name, container_type):
-    """Test access to a specific container."""
-    print(f"\n📁 Testing {container_type} Container: {container_name}")
+def probe_write_access(container_client, container_type):
+    """Upload a small test blob and delete it again, returning its name."""
+    test_blob_name = f"test-access-{container_type}.txt"
+    test_content = f"Test file created by storage test - {container_type}"
+    
+    test_blob_client = container_client.get_blob_client(test_blob_name)
+    # Upload as bytes with a known length so the SDK uses a single PUT
+    test_data = test_content.encode('utf-8')
+    test_blob_client.upload_blob(test_data, length=len(test_data), overwrite=True, max_concurrency=1)
+    
+    # Clean up test file
+    test_blob_client.delete_blob()
+    return test_blob_name
+
+
+def test_containers_concurrently(blob_service_client, containers):
+    """Test several containers at once, printing each one's report in order."""
+    def run(container_name, container_type):
+        # Each test writes to its own buffer so concurrent reports do not interleave
+        lines = []
+        ok = test_container_access(blob_service_client, container_name, container_type, log=lines.append)
+        return ok, lines
+    
+    with ThreadPoolExecutor(max_workers=len(containers)) as executor:
+        futures = [executor.submit(run, name, container_type) for name, container_type in containers]
+        results = []
+        for future in futures:
+            ok, lines = future.result()
+            for line in lines:
+                print(line)
+            results.append(ok)
+    return results
+
+
+def test_container_access(blob_service_client, container_name, container_type, log=print):
+    """Test access to a specific container, reporting through log (print by default)."""
+    log(f"\n📁 Testing {container_type} Container: {container_name}")
     
     try:
         container_client = blob_service_client.get_container_client(container_name)
         
-        # Check if container exists
-        properties = container_client.get_container_properties()
-        print(f"✅ Container exists and is accessible")
-        print(f"   Last modified: {properties.last_modified}")
-        
-        # List some blobs to test read access
-        blobs = []
-        for blob in container_client.list_blobs():
-            blobs.append(blob)
-            if len(blobs) >= 5:  # Limit to first 5 blobs
-                break
-        print(f"   Contains {len(blobs)} files")
-        
-        if blobs:
-            print("   Sample files:")
-            for i, blob in enumerate(blobs[:3], 1):
-                size_mb = blob.size / (1024 * 1024) if blob.size else 0
-                print(f"      {i}. {blob.name} ({size_mb:.1f} MB)")
+        # Check if container exists; only a yes/no is needed, not its properties
+        if not container_client.exists():
+            raise ResourceNotFoundError(f"Container '{container_name}' not found")
+        log(f"✅ Container exists and is accessible")
         
-        # Test write access (create a small test blob)
-        test_blob_name = f"test-access-{container_type}.txt"
-        test_content = f"Test file created by storage test - {container_type}"
+        # List some blobs to test read access, fetching only the first 5 in one request
+        # and formatting the sample lines in the same pass that counts them
+        pages = container_client.list_blobs(results_per_page=5).by_page()
+        blob_count = 0
+        samples = []
+        for blob in next(pages, []):
+            blob_count += 1
+            if blob_count <= 3:
+                size_mb = (blob.size or 0) / MIB
+                samples.append(f"      {blob_count}. {blob.name} ({size_mb:.1f} MB)")
+        log(f"   Contains {blob_count} files")
         
-        test_blob_client = container_client.get_blob_client(test_blob_name)
-        test_blob_client.upload_blob(test_content, overwrite=True)
-        print(f"✅ Write access confirmed (created test file: {test_blob_name})")
+        if samples:
+            log("   Sample files:")
+            for sample in samples:
+                log(sample)
         
-        # Clean up test file
-        test_blob_client.delete_blob()
-        print(f"✅ Test file cleaned up")
+        # Test write access (create a small test blob)
+        test_blob_name = probe_write_access(container_client, container_type)
+        log(f"✅ Write access confirmed (created test file: {test_blob_name})")
+        log(f"✅ Test file cleaned up")
         
         return True
         
     except ResourceNotFoundError:
-        print(f"❌ Container '{container_name}' does not exist")
-        print(f"   Please create the container in your storage account")
+        log(f"❌ Container '{container_name}' does not exist")
+        log(f"   Please create the container in your storage account")
         return False
     except Exception as e:
-        print(f"❌ Container access failed: {str(e)}")
-        print(f"   Check permissions for container '{container_name}'")
+        log(f"❌ Container access failed: {str(e)}")
+        log(f"   Check permissions for container '{container_name}'")
         return False
 
 
@@ -148,21 +217,23 @@ def test_pdf_files(blob_service_client, source_container):
     try:
         container_client = blob_service_client.get_container_client(source_container)
         
-        # List all blobs and filter for PDFs
-        all_blobs = list(container_client.list_blobs())
-        pdf_blobs = [blob for blob in all_blobs if blob.name.lower().endswith('.pdf')]
-        
-        print(f"   Total files: {len(all_blobs)}")
-        print(f"   PDF files: {len(pdf_blobs)}")
+        # Stop listing once there are enough PDFs for the sample (plus one to
+        # know whether there are more), honouring the configured source prefix
+        source_prefix = os.getenv('AZURE_STORAGE_SOURCE_PREFIX') or None
+        pdf_iter = (
+            blob for blob in container_client.list_blobs(name_starts_with=source_prefix)
+            if blob.name.lower().endswith('.pdf')
+        )
+        pdf_blobs = list(itertools.islice(pdf_iter, PDF_SAMPLE_SIZE + 1))
         
         if pdf_blobs:
             print("✅ Found PDF files ready for processing:")
-            for i, blob in enumerate(pdf_blobs[:5], 1):  # Show first 5
-                size_mb = blob.size / (1024 * 1024) if blob.size else 0
+            for i, blob in enumerate(pdf_blobs[:PDF_SAMPLE_SIZE], 1):
+                size_mb = (blob.size or 0) / MIB
                 print(f"      {i}. {blob.name} ({size_mb:.1f} MB)")
             
-            if len(pdf_blobs) > 5:
-                print(f"      ... and {len(pdf_blobs) - 5} more PDF files")
+            if len(pdf_blobs) > PDF_SAMPLE_SIZE:
+                print("      ... and more PDF files")
                 
             return True
         else:
@@ -178,7 +249,7 @@ def test_pdf_files(blob_service_client, source_container):
 def main():
     """Run storage connectivity tests."""
     print("🔧 Azure Storage Connectivity Test")
-    print("=" * 60)
+    print(SEPARATOR)
     
     try:
         # Test configuration
@@ -195,21 +266,28 @@ def main():
             print("\n❌ Storage authentication failed.")
             return 1
         
-        # Test container access
-        source_ok = test_container_access(blob_service_client, source_container, "source")
-        output_ok = test_container_access(blob_service_client, output_container, "output")
+        # Test container access for both containers at the same time
+        source_ok, output_ok = test_containers_concurrently(blob_service_client, [
+            (source_container, "source"),
+            (output_container, "output"),
+        ])
         
         # Test for PDF files
         pdf_ok = test_pdf_files(blob_service_client, source_container)
         
         # Summary
-        print("\n" + "=" * 60)
-        print("📊 Storage Test Summary:")
-        print(f"   Configuration: {'✅ OK' if config_ok else '❌ Failed'}")
-        print(f"   Authentication: {'✅ OK' if auth_ok else '❌ Failed'}")
-        print(f"   Source Container: {'✅ OK' if source_ok else '❌ Failed'}")
-        print(f"   Output Container: {'✅ OK' if output_ok else '❌ Failed'}")
-        print(f"   PDF Files: {'✅ Found' if pdf_ok else '⚠️  None found'}")
+        summary = [
+            ("Configuration", '✅ OK' if config_ok else '❌ Failed'),
+            ("Authentication", '✅ OK' if auth_ok else '❌ Failed'),
+            ("Source Container", '✅ OK' if source_ok else '❌ Failed'),
+            ("Output Container", '✅ OK' if output_ok else '❌ Failed'),
+            ("PDF Files", '✅ Found' if pdf_ok else '⚠️  None found'),
+        ]
+        print("\n".join([
+            "\n" + SEPARATOR,
+            "📊 Storage Test Summary:",
+            *(SUMMARY_LINE.format(name=name, status=status) for name, status in summary),
+        ]))
         
         if config_ok and auth_ok and source_ok and output_ok:
             print("\n🎉 Storage connectivity test passed!")